@@ -6,25 +6,91 @@ Run from the same directory as skygeni_sales_data.csv.
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 from sklearn.model_selection import train_test_split
 
 # ---------------------------------------------------------------------------
 # Load and prepare data
 # ---------------------------------------------------------------------------
+CATEGORICAL_COLS = ["region", "industry", "product_type", "lead_source", "deal_stage", "outcome"]
+
 def load_data(path="skygeni_sales_data.csv"):
-    df = pd.read_csv(path)
-    df["created_date"] = pd.to_datetime(df["created_date"])
-    df["closed_date"] = pd.to_datetime(df["closed_date"])
-    df["outcome_binary"] = (df["outcome"] == "Won").astype(int)
+    # PyArrow's multithreaded reader with an explicit schema; low-cardinality
+    # text columns come back dictionary-encoded as pandas categoricals
+    df = pd.read_csv(
+        path,
+        engine="pyarrow",
+        dtype={col: "category" for col in CATEGORICAL_COLS},
+        parse_dates=["created_date", "closed_date"],
+        date_format="%Y-%m-%d",
+    )
     return df
 
+# Won/Lost straight from the outcome dictionary codes (int8) – no separate
+# 0/1 column is kept on the frame. An extract with no won deals has no
+# "Won" category at all, so every row is a loss.
+def won_mask(df):
+    outcome = df["outcome"]
+    if "Won" not in outcome.cat.categories:
+        return np.zeros(len(df), dtype=bool)
+    return outcome.cat.codes.to_numpy() == outcome.cat.categories.get_loc("Won")
+
 df = load_data()
+won = won_mask(df)
+
+# ---------------------------------------------------------------------------
+# Shared win-rate aggregation
+# Factorize the key once, then a single bincount pass gives deal count and
+# win count per group (no per-call groupby/agg dispatch). Categorical keys
+# use their codes as-is, so no hash table is built at all.
+# ---------------------------------------------------------------------------
+def win_rate_by(df, col, won):
+    s = df[col]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, keys = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, keys = pd.factorize(s, sort=True)
+    valid = codes >= 0
+    codes = codes[valid]
+    wins = np.bincount(codes, weights=won[valid], minlength=len(keys))
+    deals = np.bincount(codes, minlength=len(keys))
+    seen = np.flatnonzero(deals)
+    return pd.DataFrame({"win_rate": wins[seen] / deals[seen], "deals": deals[seen]}, index=pd.Index(keys[seen], name=col))
+
+# Quarter as a plain integer (year * 4 + quarter index) instead of a Period
+# object per row; bincount over the offset codes, empty quarters dropped
+def win_rate_by_quarter(df, won):
+    closed = df["closed_date"]
+    valid = closed.notna().to_numpy()
+    if not valid.any():
+        return pd.DataFrame(columns=["quarter", "win_rate", "deals"])
+    qcode = (closed.dt.year.to_numpy()[valid] * 4 + closed.dt.quarter.to_numpy()[valid] - 1).astype(np.int32)
+    first = qcode.min()
+    wins = np.bincount(qcode - first, weights=won[valid])
+    deals = np.bincount(qcode - first)
+    seen = np.flatnonzero(deals)
+    quarters = [f"{q // 4}Q{q % 4 + 1}" for q in seen + first]
+    return pd.DataFrame({"quarter": quarters, "win_rate": wins[seen] / deals[seen], "deals": deals[seen]})
+
+# Aggregated once per key and shared by the metrics and insights below
+wr_by_region = win_rate_by(df, "region", won)
+wr_by_lead_source = win_rate_by(df, "lead_source", won)
 
 # ---------------------------------------------------------------------------
 # Part 2a – Exploratory Data Analysis
 # ---------------------------------------------------------------------------
-def run_eda(df):
+# Top-k value counts of a categorical from one bincount over its codes
+# (no hash table, no full sort – only the k winners are ordered)
+def top_counts(s, k=8):
+    codes = s.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(s.cat.categories))
+    top = np.argpartition(-counts, k)[:k] if len(counts) > k else np.arange(len(counts))
+    top = top[np.lexsort((top, -counts[top]))]
+    return pd.Series(counts[top], index=s.cat.categories[top].rename(s.name), name="count")
+
+def run_eda(df, won):
     print("=" * 60)
     print("PART 2 – EXPLORATORY DATA ANALYSIS")
     print("=" * 60)
@@ -36,35 +102,32 @@ def run_eda(df):
     print("\n--- Outcome distribution ---")
     print(df["outcome"].value_counts())
     print("\n--- Win rate (overall) ---")
-    print(f"  {df['outcome_binary'].mean():.2%}")
+    print(f"  {won.mean():.2%}")
     print("\n--- Key columns value counts ---")
     for col in ["region", "industry", "product_type", "lead_source", "deal_stage"]:
         print(f"\n{col}:")
-        print(df[col].value_counts().head(8))
+        print(top_counts(df[col]))
     print("\n--- Numeric summary ---")
     print(df[["deal_amount", "sales_cycle_days"]].describe())
     print("\n--- Date range ---")
     print(f"  created_date: {df['created_date'].min()} to {df['created_date'].max()}")
     print(f"  closed_date: {df['closed_date'].min()} to {df['closed_date'].max()}")
 
-run_eda(df)
+run_eda(df, won)
 
 # ---------------------------------------------------------------------------
 # Custom Metric 1: Segment Impact Score
 # Volume-weighted "concern" – high volume + low win rate = high impact
 # Formula: deal_count * (1 - win_rate) so we prioritize segments where we lose a lot
 # ---------------------------------------------------------------------------
-def segment_impact_score(df, segment_col):
-    grp = df.groupby(segment_col).agg(
-        deals=("deal_id", "count"),
-        win_rate=("outcome_binary", "mean"),
-    ).reset_index()
+def segment_impact_score(wr):
+    grp = wr[["deals", "win_rate"]].reset_index()
     grp["segment_impact_score"] = grp["deals"] * (1 - grp["win_rate"])
     grp = grp.sort_values("segment_impact_score", ascending=False)
     return grp
 
 print("\n--- Custom Metric 1: Segment Impact Score (by region) ---")
-impact_region = segment_impact_score(df, "region")
+impact_region = segment_impact_score(wr_by_region)
 print(impact_region.to_string(index=False))
 print("\nInterpretation: Higher score = more deals lost in that segment (volume × loss rate).")
 print("Use this to prioritize where to investigate or reallocate effort.")
@@ -74,9 +137,11 @@ print("Use this to prioritize where to investigate or reallocate effort.")
 # Median sales_cycle_days (Won) vs (Lost) by segment; large gap = timing/process signal
 # ---------------------------------------------------------------------------
 def cycle_outcome_gap(df, segment_col):
-    won = df[df["outcome"] == "Won"].groupby(segment_col)["sales_cycle_days"].median()
-    lost = df[df["outcome"] == "Lost"].groupby(segment_col)["sales_cycle_days"].median()
-    gap = (lost - won).reindex(won.index).fillna(0)
+    med = df.groupby([segment_col, "outcome"], observed=True, sort=False)["sales_cycle_days"].median().unstack("outcome")
+    won = med.get("Won", pd.Series(np.nan, index=med.index))
+    lost = med.get("Lost", pd.Series(np.nan, index=med.index))
+    # No Lost deals -> 0; no Won deals -> NaN, so Won-less segments sort last
+    gap = (lost - won).fillna(0).where(won.notna())
     return pd.DataFrame({"median_cycle_won": won, "median_cycle_lost": lost, "cycle_outcome_gap_days": gap})
 
 print("\n--- Custom Metric 2: Cycle–Outcome Gap (by lead_source) ---")
@@ -93,8 +158,7 @@ print("THREE BUSINESS INSIGHTS")
 print("=" * 60)
 
 # Insight 1: Win rate by lead source
-wr_source = df.groupby("lead_source")["outcome_binary"].agg(["mean", "count"]).round(4)
-wr_source.columns = ["win_rate", "deals"]
+wr_source = wr_by_lead_source.round(4)
 wr_source = wr_source.sort_values("win_rate", ascending=False)
 print("\n--- Insight 1: Win rate by lead source ---")
 print(wr_source.to_string())
@@ -104,9 +168,7 @@ print(f"\nWhy it matters: Lead source is a strong signal of deal quality. {best_
 print("Action: Increase investment in higher-win channels (e.g. Inbound, Referral) and review process for lower-win channels (e.g. Outbound, Partner).")
 
 # Insight 2: Win rate trend over time (quarterly)
-df["quarter"] = df["closed_date"].dt.to_period("Q")
-wr_q = df.groupby("quarter")["outcome_binary"].agg(["mean", "count"]).reset_index()
-wr_q.columns = ["quarter", "win_rate", "deals"]
+wr_q = win_rate_by_quarter(df, won)
 print("\n--- Insight 2: Win rate by quarter ---")
 print(wr_q.to_string(index=False))
 if len(wr_q) >= 2:
@@ -116,7 +178,7 @@ if len(wr_q) >= 2:
     print("Action: If dropping, combine with driver analysis to find which segments drove the change; if improving, double down on recent initiatives.")
 
 # Insight 3: Win rate by region and volume
-wr_region = df.groupby("region").agg(win_rate=("outcome_binary", "mean"), deals=("deal_id", "count")).sort_values("deals", ascending=False)
+wr_region = wr_by_region.sort_values("deals", ascending=False)
 print("\n--- Insight 3: Win rate and volume by region ---")
 print(wr_region.to_string())
 print("\nWhy it matters: Regions with high volume but low win rate have the biggest revenue impact.")
@@ -129,27 +191,57 @@ print("\n" + "=" * 60)
 print("PART 3 – WIN RATE DRIVER ANALYSIS (DECISION ENGINE)")
 print("=" * 60)
 
-# Prepare features
-model_df = df.copy()
-for col in ["region", "industry", "product_type", "lead_source"]:
-    model_df[col] = model_df[col].astype("category")
+# Prepare features – categoricals are already cast in load_data, so the
+# pipeline reads df directly instead of working on a copy
+num_cols = ["deal_amount", "sales_cycle_days"]
+cat_cols = ["region", "industry", "product_type", "lead_source"]
+y = won.view(np.int8)
 
-# Dummy encoding (drop first to avoid collinearity)
-X = pd.get_dummies(model_df[["region", "industry", "product_type", "lead_source", "deal_amount", "sales_cycle_days"]], drop_first=True)
-y = model_df["outcome_binary"]
+# Handle any inf/nan – one float32 conversion, then cleaned in place
+def clean_numeric(X):
+    Xa = X.to_numpy(dtype=np.float32)
+    if not Xa.flags.writeable:
+        Xa = Xa.copy()
+    return np.nan_to_num(Xa, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
 
-# Handle any inf/nan
-X = X.replace([np.inf, -np.inf], np.nan).fillna(0)
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# Only the two numeric columns are standardized (dense, so centering is
+# fine); the one-hot dummies go straight to float32 CSR unscaled (drop first
+# to avoid collinearity). sparse_threshold=1.0 keeps the stacked output sparse.
+features = ColumnTransformer(
+    [
+        ("num", Pipeline([
+            ("clean", FunctionTransformer(clean_numeric, feature_names_out="one-to-one")),
+            ("scale", StandardScaler()),
+        ]), num_cols),
+        # Observed categories only: a missing value encodes as all zeros (as
+        # get_dummies did) rather than becoming its own "_nan" feature
+        ("cat", OneHotEncoder(
+            drop="first",
+            categories=[list(df[col].cat.categories) for col in cat_cols],
+            handle_unknown="ignore",
+            sparse_output=True,
+            dtype=np.float32,
+        ), cat_cols),
+    ],
+    sparse_threshold=1.0,
+    verbose_feature_names_out=False,
+)
+X_scaled = features.fit_transform(df)
+feature_names = features.get_feature_names_out()
 X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
 
-model = LogisticRegression(max_iter=1000, random_state=42)
+# saga works directly on the float32 CSR matrix and scales with its non-zeros
+model = LogisticRegression(solver="saga", max_iter=1000, random_state=42)
 model.fit(X_train, y_train)
-coef = pd.DataFrame({"feature": X.columns, "coefficient": model.coef_[0]}).sort_values("coefficient", key=abs, ascending=False)
+# Top 12 by |coefficient|: partial selection, then order only those 12
+coefs = model.coef_[0]
+abs_coefs = np.abs(coefs)
+top = np.argpartition(-abs_coefs, 12)[:12] if len(coefs) > 12 else np.arange(len(coefs))
+top = top[np.lexsort((top, -abs_coefs[top]))]
+coef = pd.DataFrame({"feature": feature_names[top], "coefficient": coefs[top]})
 
 print("\n--- Top drivers (by absolute coefficient) ---")
-print(coef.head(12).to_string(index=False))
+print(coef.to_string(index=False))
 print("\nPositive coefficient = associated with higher win rate; negative = lower win rate.")
 
 # Marginal effect: approximate change in win probability per 1 std change in numeric features